@@ -1,18 +1,143 @@
 from django.contrib import admin
-from .models import Incident, Asset, Attachment, StatusLabel, ActivityLog
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import Incident, Asset, Attachment, StatusLabel, ActivityLog, AssignmentRule, AgentLoad
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Skips COUNT(*) on unfiltered changelists of big PostgreSQL tables by using
+    the planner's row estimate. Filtered lists and other databases count exactly.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= self.estimate_threshold:
+                return int(row[0])
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Avoid the second, unfiltered COUNT(*) behind "x results (y total)"
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class PriorityFilter(admin.SimpleListFilter):
+    # Fixed choices instead of a SELECT DISTINCT over every incident
+    title = 'priority'
+    parameter_name = 'priority'
+
+    def lookups(self, request, model_admin):
+        return [(p, p) for p in ('Low', 'Medium', 'High', 'Urgent', 'Critical')]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(priority=self.value())
+        return queryset
+
+
+class AgentFilter(admin.SimpleListFilter):
+    # Only IT Staff can be assigned, so don't list every user account
+    title = 'agent'
+    parameter_name = 'agent'
+
+    def lookups(self, request, model_admin):
+        staff = User.objects.filter(groups__name='IT Staff').order_by('first_name', 'last_name')
+        return [('none', 'Unassigned')] + [(str(u.id), u.get_full_name() or u.username) for u in staff]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'none':
+            return queryset.filter(agent__isnull=True)
+        if self.value():
+            return queryset.filter(agent_id=self.value())
+        return queryset
+
+
+class IdSearchMixin:
+    # Numeric search terms also match an indexed id column (the ticket number by default)
+    id_search_field = 'pk'
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip().lstrip('#')
+        if term.isdigit():
+            # OR against the incoming queryset so active list filters still apply
+            results |= queryset.filter(**{self.id_search_field: int(term)})
+        return results, may_have_duplicates
+
 
 @admin.register(Incident)
-class IncidentAdmin(admin.ModelAdmin):
+class IncidentAdmin(IdSearchMixin, LargeTableAdmin):
     list_display = ('title', 'status', 'priority', 'agent', 'submitted_at')
-    list_filter = ('status', 'priority', 'agent')
-    search_fields = ('title', 'description', 'requester_name')
+    list_filter = ('status', PriorityFilter, AgentFilter)
+    list_select_related = ('status', 'agent')
+    # Prefix and exact lookups served by the case-insensitive indexes from migration 0012;
+    # a contains search (or one over description) would scan the whole table
+    search_fields = ('^title', '^requester_name', '=requester_email')
+    search_help_text = 'Ticket number, start of the title or requester name, or exact requester email'
+    autocomplete_fields = ('status', 'agent')
+    # Legacy free text; watchers live in IncidentWatcher now and editing this would not reach them
+    readonly_fields = ('watching_by',)
+    date_hierarchy = 'submitted_at'
 
 @admin.register(Asset)
 class AssetAdmin(admin.ModelAdmin):
     list_display = ('name', 'asset_type', 'tag', 'department', 'managed_by')
     list_filter = ('asset_type', 'department', 'managed_by_group')
-    search_fields = ('name', 'tag', 'description')
+    list_select_related = ('managed_by',)
+    search_fields = ('name', '=tag')
+    autocomplete_fields = ('managed_by',)
+
+@admin.register(AssignmentRule)
+class AssignmentRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'group', 'category', 'priority', 'order', 'is_active')
+    list_editable = ('order', 'is_active')
+    list_filter = ('is_active', 'group')
+    filter_horizontal = ('agents',)
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name == 'agents':
+            kwargs['queryset'] = User.objects.filter(groups__name='IT Staff')
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+@admin.register(AgentLoad)
+class AgentLoadAdmin(admin.ModelAdmin):
+    list_display = ('user', 'open_count')
+    list_select_related = ('user',)
+    ordering = ('open_count',)
+    readonly_fields = ('user', 'open_count')
+
+@admin.register(Attachment)
+class AttachmentAdmin(IdSearchMixin, LargeTableAdmin):
+    list_display = ('file', 'incident_id', 'uploaded_at')
+    id_search_field = 'incident_id'
+    search_fields = ('^file',)
+    search_help_text = 'Ticket number or start of the file path'
+    raw_id_fields = ('incident',)
+    date_hierarchy = 'uploaded_at'
+
+@admin.register(StatusLabel)
+class StatusLabelAdmin(admin.ModelAdmin):
+    list_display = ('name', 'color')
+    search_fields = ('name',)
 
-admin.site.register(Attachment)
-admin.site.register(StatusLabel)
-admin.site.register(ActivityLog)
\ No newline at end of file
+@admin.register(ActivityLog)
+class ActivityLogAdmin(IdSearchMixin, LargeTableAdmin):
+    list_display = ('activity_type', 'incident_id', 'user', 'old_value', 'new_value', 'timestamp')
+    list_select_related = ('user',)
+    id_search_field = 'incident_id'
+    search_fields = ('=activity_type',)
+    search_help_text = 'Ticket number or exact activity type'
+    raw_id_fields = ('incident', 'user')
+    date_hierarchy = 'timestamp'
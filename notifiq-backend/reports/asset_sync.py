@@ -0,0 +1,173 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import Asset
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Asset columns a feed is allowed to set. `tag` is the sync key and `managed_by`
+# is resolved separately from a username or email.
+SYNC_FIELDS = [
+    'name', 'asset_type', 'impact', 'description', 'end_of_life',
+    'location', 'department', 'managed_by_group',
+]
+
+
+def _clean_record(record):
+    data = {}
+    for key, value in record.items():
+        key = str(key).strip().lower().replace(' ', '_')
+        if isinstance(value, str):
+            value = value.strip()
+        data[key] = value
+    return data
+
+
+def _field_value(field, value):
+    # Blank CSV cells arrive as ''. full_clean() skips blank values, so a '' left on a
+    # nullable date would only fail later, inside bulk_create.
+    if value == '' and Asset._meta.get_field(field).null:
+        return None
+    return value
+
+
+def _resolve_managers(keys):
+    """Map each lowercased username/email in `keys` to a user id with a single query."""
+    lowered = {k.lower() for k in keys if k}
+    if not lowered:
+        return {}
+    users = {}
+    queryset = (
+        User.objects.annotate(username_lower=Lower('username'), email_lower=Lower('email'))
+        .filter(Q(username_lower__in=lowered) | Q(email_lower__in=lowered))
+        .values_list('id', 'username', 'email')
+    )
+    for pk, username, email in queryset:
+        if username.lower() in lowered:
+            users[username.lower()] = pk
+        if email and email.lower() in lowered:
+            users.setdefault(email.lower(), pk)
+    return users
+
+
+class AssetSync:
+    """
+    Reconciles an inventory feed against existing assets using `tag` as the key.
+
+    Existing rows are fetched with one `in_bulk` lookup, managers with one user
+    query, and the resulting creates, updates and retirements are written with
+    batched bulk_create calls inside a single transaction.
+    """
+
+    def __init__(self, retire_missing=False, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+        self.retire_missing = retire_missing
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.errors = []
+
+    def _error(self, index, tag, error):
+        if isinstance(error, ValidationError) and hasattr(error, 'message_dict'):
+            messages = error.message_dict
+        else:
+            messages = {'record': [str(error)]}
+        self.errors.append({'index': index, 'tag': tag, 'errors': messages})
+
+    def _upsert(self, assets, fields):
+        # An upsert on the primary key is one plain INSERT per batch, which is far
+        # cheaper than the CASE WHEN statements bulk_update() builds.
+        if assets:
+            Asset.objects.bulk_create(
+                assets, batch_size=self.batch_size, update_conflicts=True,
+                unique_fields=['id'], update_fields=fields,
+            )
+
+    def run(self, records):
+        feed = {}
+        for index, record in enumerate(records):
+            data = _clean_record(record)
+            tag = data.get('tag')
+            if not tag:
+                self._error(index, None, ValidationError({'tag': 'This field is required.'}))
+                continue
+            # Later rows for the same tag win, matching how the export is read.
+            feed[str(tag)] = (index, data)
+
+        if self.retire_missing:
+            existing = {a.tag: a for a in Asset.objects.exclude(tag__isnull=True)}
+        else:
+            existing = Asset.objects.in_bulk(list(feed), field_name='tag')
+
+        managers = _resolve_managers(
+            str(data['managed_by']) for _, data in feed.values() if data.get('managed_by')
+        )
+
+        to_create, to_update, changed_fields = [], [], set()
+        unchanged = 0
+        for tag, (index, data) in feed.items():
+            asset = existing.get(tag)
+            is_new = asset is None
+            if is_new:
+                asset = Asset(tag=tag)
+            changes = {f: _field_value(f, data[f]) for f in SYNC_FIELDS if f in data}
+            if 'managed_by' in data:
+                key = str(data['managed_by'] or '')
+                manager_id = managers.get(key.lower()) if key else None
+                if key and manager_id is None:
+                    self._error(index, tag, ValidationError({'managed_by': f'Unknown user "{key}".'}))
+                    continue
+                changes['managed_by_id'] = manager_id
+
+            before = {f: getattr(asset, f) for f in changes}
+            for field, value in changes.items():
+                setattr(asset, field, value)
+            try:
+                asset.full_clean(exclude=['managed_by'], validate_unique=False, validate_constraints=False)
+            except ValidationError as e:
+                if not is_new:
+                    for field, value in before.items():
+                        setattr(asset, field, value)
+                self._error(index, tag, e)
+                continue
+
+            if is_new:
+                to_create.append(asset)
+                continue
+            # full_clean converted the values, so this compares like with like.
+            fields = {f for f in changes if getattr(asset, f) != before[f]}
+            if fields:
+                changed_fields |= fields
+                to_update.append(asset)
+            else:
+                unchanged += 1
+
+        to_retire = []
+        if self.retire_missing:
+            today = timezone.localdate()
+            for tag, asset in existing.items():
+                if tag not in feed and (asset.end_of_life is None or asset.end_of_life > today):
+                    asset.end_of_life = today
+                    to_retire.append(asset)
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Asset.objects.bulk_create(to_create, batch_size=self.batch_size)
+                self._upsert(to_update, sorted(changed_fields))
+                self._upsert(to_retire, ['end_of_life'])
+
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'unchanged': unchanged,
+            'retired': len(to_retire),
+            'failed': len(self.errors),
+            'errors': self.errors,
+            'dry_run': self.dry_run,
+        }
+
+
+def sync_assets(records, **kwargs):
+    return AssetSync(**kwargs).run(records)
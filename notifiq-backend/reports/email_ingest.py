@@ -0,0 +1,182 @@
+import mailbox
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .models import Incident, Attachment, ActivityLog, StatusLabel, InboundEmail, IncidentWatcher
+from .similarity import index_incidents
+from .routing import Router
+from .watchers import queue_watcher_events
+from .mail_parsing import parse_message
+
+DEFAULT_BATCH_SIZE = 200
+MAX_REPORTED_ERRORS = 1000
+
+REPLY_PREFIX = re.compile(r'^\s*((re|fw|fwd|aw)\s*:\s*)+', re.IGNORECASE)
+
+
+def iter_mailbox(path):
+    """Yield raw message bytes from a Maildir directory or an mbox file."""
+    if os.path.isdir(path):
+        box = mailbox.Maildir(path, factory=None, create=False)
+        # Maildir keys start with the delivery timestamp, so sorting them puts
+        # originals ahead of their replies.
+        keys = sorted(box.iterkeys())
+    else:
+        box = mailbox.mbox(path, factory=None, create=False)
+        keys = box.iterkeys()
+    try:
+        for key in keys:
+            yield box.get_bytes(key)
+    finally:
+        box.close()
+
+
+class EmailIngestor:
+    """
+    Turns a mailbox into incidents. MIME parsing is fanned out to a process
+    pool; database work happens per batch with a fixed number of queries,
+    so the cost per message does not grow with the size of the ticket table.
+    """
+
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.open_status = StatusLabel.objects.filter(name='Open').first()
+        self.stats = {'messages': 0, 'created': 0, 'threaded': 0, 'duplicates': 0, 'attachments': 0, 'failed': 0}
+        self.errors = []
+
+    def _parsed_batches(self, raw_messages):
+        raw_messages = iter(raw_messages)
+        if self.workers == 1:
+            while batch := list(islice(raw_messages, self.batch_size)):
+                yield [parse_message(raw) for raw in batch]
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Feed the pool one batch at a time; Executor.map would otherwise
+            # pull the whole mailbox into memory up front.
+            while batch := list(islice(raw_messages, self.batch_size)):
+                yield list(pool.map(parse_message, batch, chunksize=max(len(batch) // 16, 1)))
+
+    def _store_batch(self, parsed):
+        failed = [m for m in parsed if 'error' in m]
+        if failed:
+            self.stats['failed'] += len(failed)
+            room = MAX_REPORTED_ERRORS - len(self.errors)
+            self.errors.extend({'message_id': m['message_id'], 'error': m['error']} for m in failed[:room])
+            parsed = [m for m in parsed if 'error' not in m]
+        keys = [m['message_id'] for m in parsed]
+        seen = set(InboundEmail.objects.filter(message_id__in=keys).values_list('message_id', flat=True))
+        fresh = []
+        for message in parsed:
+            if message['message_id'] in seen:
+                self.stats['duplicates'] += 1
+                continue
+            seen.add(message['message_id'])
+            fresh.append(message)
+        if not fresh:
+            return
+
+        references = {ref for m in fresh for ref in m['references']}
+        thread_map = dict(
+            InboundEmail.objects.filter(message_id__in=references).values_list('message_id', 'incident_id')
+        )
+        # A subject token is only trusted from the requester or a watcher of that incident,
+        # otherwise anyone could add notes and attachments to any ticket by guessing its number.
+        incident_refs = {m['incident_ref'] for m in fresh if m['incident_ref']}
+        token_senders = {}
+        for incident_id, email in Incident.objects.filter(id__in=incident_refs).values_list('id', 'requester_email'):
+            token_senders.setdefault(incident_id, set()).add((email or '').lower())
+        for incident_id, email in IncidentWatcher.objects.filter(incident_id__in=incident_refs).values_list(
+            'incident_id', 'email'
+        ):
+            token_senders.setdefault(incident_id, set()).add(email.lower())
+        senders = {m['from_email'] for m in fresh if m['from_email']}
+        users = dict(User.objects.filter(email__in=senders).values_list('email', 'id'))
+
+        new_messages, new_incidents, replies = [], [], []
+        in_batch = set()
+        for message in fresh:
+            incident_id = next((thread_map[r] for r in message['references'] if r in thread_map), None)
+            if incident_id is None and message['from_email'] in token_senders.get(message['incident_ref'], ()):
+                incident_id = message['incident_ref']
+            in_batch.add(message['message_id'])
+            if incident_id is None and any(r in in_batch for r in message['references']):
+                # Reply to a message that arrived earlier in this same batch.
+                replies.append((message, None))
+                continue
+            if incident_id is None:
+                new_messages.append(message)
+                new_incidents.append(Incident(
+                    title=(REPLY_PREFIX.sub('', message['subject']) or '(no subject)')[:200],
+                    description=message['body'],
+                    requester_name=message['from_name'][:100],
+                    requester_email=message['from_email'][:100],
+                    source='email',
+                    status=self.open_status,
+                ))
+            else:
+                replies.append((message, incident_id))
+
+        with transaction.atomic():
+            router = Router()
+            router.assign(new_incidents)
+            Incident.objects.bulk_create(new_incidents)
+            router.commit_loads()
+            index_incidents(new_incidents)
+            for message, incident in zip(new_messages, new_incidents):
+                thread_map[message['message_id']] = incident.id
+
+            notes, inbound, attachments = [], [], []
+            for message, incident_id in replies:
+                if incident_id is None:
+                    incident_id = next(thread_map[r] for r in message['references'] if r in thread_map)
+                thread_map[message['message_id']] = incident_id
+                notes.append(ActivityLog(
+                    incident_id=incident_id,
+                    user_id=users.get(message['from_email']),
+                    activity_type='Email Reply',
+                    note=message['body'],
+                ))
+            ActivityLog.objects.bulk_create(notes)
+            queue_watcher_events(notes)
+
+            for message in fresh:
+                incident_id = thread_map[message['message_id']]
+                inbound.append(InboundEmail(
+                    message_id=message['message_id'], incident_id=incident_id, sender=message['from_email'][:255],
+                ))
+                for filename, content in message['attachments']:
+                    attachment = Attachment(incident_id=incident_id)
+                    # Write the file through storage ourselves because bulk_create skips FieldFile.save().
+                    attachment.file.save(os.path.basename(filename), ContentFile(content), save=False)
+                    attachments.append(attachment)
+            InboundEmail.objects.bulk_create(inbound)
+            Attachment.objects.bulk_create(attachments)
+
+        self.stats['created'] += len(new_incidents)
+        self.stats['threaded'] += len(replies)
+        self.stats['attachments'] += len(attachments)
+
+    def run(self, raw_messages):
+        started = time.perf_counter()
+        for parsed in self._parsed_batches(raw_messages):
+            self.stats['messages'] += len(parsed)
+            self._store_batch(parsed)
+        elapsed = time.perf_counter() - started
+        return {
+            **self.stats,
+            'errors': self.errors,
+            'seconds': round(elapsed, 3),
+            'messages_per_second': round(self.stats['messages'] / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def ingest_mailbox(path, **kwargs):
+    return EmailIngestor(**kwargs).run(iter_mailbox(path))
@@ -0,0 +1,22 @@
+import django_filters
+
+from .models import Incident
+from .tagging import parse_tag_param, filter_any_tags, filter_all_tags
+
+
+class IncidentFilter(django_filters.FilterSet):
+    # ?tags=a,b matches incidents with any of the tags, ?tags__all=a,b only those with every tag
+    tags = django_filters.CharFilter(method='filter_tags')
+    tags__all = django_filters.CharFilter(method='filter_tags_all')
+
+    class Meta:
+        model = Incident
+        fields = ['requester_email', 'agent', 'status__name']
+
+    def filter_tags(self, queryset, name, value):
+        names = parse_tag_param(value)
+        return filter_any_tags(queryset, names) if names else queryset
+
+    def filter_tags_all(self, queryset, name, value):
+        names = parse_tag_param(value)
+        return filter_all_tags(queryset, names) if names else queryset
@@ -0,0 +1,260 @@
+import codecs
+import csv
+import io
+import os
+import zipfile
+from datetime import datetime, date
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Incident, StatusLabel, IncidentWatcher
+from .similarity import index_incidents
+from .routing import recount_loads
+from .tagging import sync_tags
+from .watchers import parse_watching_by, watcher_lookup
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns we accept from an import file. Anything else is ignored.
+IMPORT_FIELDS = [
+    'title', 'description', 'priority', 'requester_name', 'requester_email',
+    'source', 'urgency', 'impact', 'group', 'department', 'category', 'subcategory',
+    'watching_by', 'due_date', 'created_at', 'first_response_at', 'resolved_at',
+]
+DATETIME_FIELDS = {'due_date', 'created_at', 'first_response_at', 'resolved_at'}
+
+
+class ImportFileError(ValueError):
+    """The file itself could not be read (encoding, CSV syntax, corrupt workbook)."""
+
+
+def _check_encoding(fileobj, encoding='utf-8-sig'):
+    """
+    Decode a seekable binary file once up front so an encoding error is
+    reported before any rows are committed, then rewind it.
+    """
+    if not fileobj.seekable():
+        return
+    start = fileobj.tell()
+    decoder = codecs.getincrementaldecoder(encoding)()
+    line = 1
+    for chunk in iter(lambda: fileobj.read(1 << 16), b''):
+        try:
+            decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            line += chunk[:max(e.start, 0)].count(b'\n')
+            raise ImportFileError(f'File is not valid UTF-8 (line {line}).') from e
+        line += chunk.count(b'\n')
+    try:
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError as e:
+        raise ImportFileError(f'File is not valid UTF-8 (line {line}).') from e
+    fileobj.seek(start)
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def iter_csv_rows(fileobj):
+    """Yield one dict per CSV line without reading the whole file into memory."""
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        _check_encoding(fileobj)
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [_normalize_header(h) for h in header]
+    for values in reader:
+        yield dict(zip(header, values))
+
+
+def iter_xlsx_rows(fileobj):
+    """Yield one dict per worksheet row using openpyxl's read-only mode."""
+    from openpyxl import load_workbook
+
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError) as e:
+        raise ImportFileError(f'Could not open workbook: {e}') from e
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [_normalize_header(h) for h in header]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext == '.csv':
+        return iter_csv_rows(fileobj)
+    if ext in ('.xlsx', '.xlsm'):
+        return iter_xlsx_rows(fileobj)
+    raise ValueError(f'Unsupported file type "{ext}". Use .csv or .xlsx.')
+
+
+class IncidentImporter:
+    """
+    Turns parsed rows into Incident objects and writes them with bulk_create.
+    Status labels and agents are resolved from maps built once up front, so
+    the per-row cost is validation only and memory stays bounded by batch_size.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, default_status='Open', max_errors=MAX_REPORTED_ERRORS):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.statuses = {name.lower(): pk for pk, name in StatusLabel.objects.values_list('id', 'name')}
+        self.default_status_id = self.statuses.get((default_status or '').lower())
+        users = list(User.objects.values_list('id', 'username', 'email', 'first_name', 'last_name'))
+        self.agents = {}
+        for pk, username, email, _, _ in users:
+            self.agents[username.lower()] = pk
+            if email:
+                self.agents.setdefault(email.lower(), pk)
+        self.watcher_users = watcher_lookup(users)
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.aborted_at = None
+
+    def _clean_value(self, field, value):
+        if value is None:
+            return None
+        if field in DATETIME_FIELDS:
+            if isinstance(value, str):
+                value = value.strip()
+                if not value:
+                    return None
+                parsed = parse_datetime(value) or parse_date(value)
+                if parsed is None:
+                    raise ValidationError({field: f'Invalid date "{value}".'})
+                value = parsed
+            if isinstance(value, date) and not isinstance(value, datetime):
+                value = datetime.combine(value, datetime.min.time())
+            if isinstance(value, datetime) and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            return value
+        return str(value).strip()
+
+    def build_incident(self, row):
+        data = {}
+        for field in IMPORT_FIELDS:
+            value = self._clean_value(field, row.get(field))
+            if value not in (None, ''):
+                data[field] = value
+
+        status_name = str(row.get('status') or '').strip()
+        if status_name:
+            status_id = self.statuses.get(status_name.lower())
+            if status_id is None:
+                raise ValidationError({'status': f'Unknown status "{status_name}".'})
+        else:
+            status_id = self.default_status_id
+
+        agent_key = str(row.get('agent') or '').strip()
+        agent_id = None
+        if agent_key:
+            agent_id = self.agents.get(agent_key.lower())
+            if agent_id is None:
+                raise ValidationError({'agent': f'Unknown agent "{agent_key}".'})
+
+        tags = row.get('tags')
+        if tags:
+            data['tags'] = [t.strip() for t in str(tags).replace(';', ',').split(',') if t.strip()]
+
+        incident = Incident(status_id=status_id, agent_id=agent_id, **data)
+        # FK columns come from the lookup maps, so skip their per-row existence queries.
+        incident.full_clean(exclude=['status', 'agent'], validate_unique=False, validate_constraints=False)
+        return incident
+
+    def _record_error(self, line, error):
+        self.failed += 1
+        if len(self.errors) >= self.max_errors:
+            return
+        if isinstance(error, ValidationError) and hasattr(error, 'message_dict'):
+            messages = error.message_dict
+        else:
+            messages = {'row': [str(error)]}
+        self.errors.append({'row': line, 'errors': messages})
+
+    def _create_watchers(self, batch):
+        watchers = [
+            IncidentWatcher(incident_id=incident.pk, user_id=user_id, email=email)
+            for incident in batch
+            for user_id, email in parse_watching_by(incident.watching_by, self.watcher_users)
+        ]
+        IncidentWatcher.objects.bulk_create(watchers, batch_size=self.batch_size, ignore_conflicts=True)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            Incident.objects.bulk_create(batch, batch_size=self.batch_size)
+            # bulk_create skips post_save, so index the new rows and refresh agent loads here.
+            index_incidents(batch)
+            sync_tags(batch)
+            self._create_watchers(batch)
+            agent_ids = {incident.agent_id for incident in batch if incident.agent_id}
+            if agent_ids:
+                recount_loads(agent_ids)
+        self.created += len(batch)
+        batch.clear()
+
+    def run(self, rows):
+        batch = []
+        rows = iter(rows)
+        # Line 1 is the header row.
+        line = 1
+        while True:
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            except (UnicodeDecodeError, csv.Error, ImportFileError) as e:
+                if line == 1:
+                    # Nothing has been read, so nothing was written: reject the file outright.
+                    raise ImportFileError(str(e)) from e
+                # Rows before this point may already be committed; stop and report where.
+                self._record_error(line + 1, e)
+                self.aborted_at = line + 1
+                break
+            line += 1
+            try:
+                batch.append(self.build_incident(row))
+            except (ValidationError, ValueError, TypeError) as e:
+                self._record_error(line, e)
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+        self._flush(batch)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'aborted_at_line': self.aborted_at,
+        }
+
+
+def import_incidents(fileobj, filename, **kwargs):
+    return IncidentImporter(**kwargs).run(iter_rows(fileobj, filename))
@@ -0,0 +1,70 @@
+"""
+MIME parsing for email ingestion.
+
+This module is imported by ProcessPoolExecutor workers, which under the spawn
+and forkserver start methods do not have Django set up, so it must stay free
+of Django and ORM imports.
+"""
+import hashlib
+import re
+from email import policy
+from email.parser import BytesParser
+from email.utils import parseaddr
+
+# Subjects we send out carry "[#<id>]" so replies thread even without References headers.
+# At most 18 digits, so the id always fits a signed 64-bit primary key column.
+INCIDENT_TOKEN = re.compile(r'\[#0*(\d{1,18})\]')
+
+
+def _message_ids(value):
+    return re.findall(r'<[^>]+>', value or '')
+
+
+def _text(part):
+    try:
+        return part.get_content(errors='replace')
+    except LookupError:
+        # Unknown charset: decode the raw bytes as UTF-8 rather than dropping the message
+        payload = part.get_payload(decode=True) or b''
+        return payload.decode('utf-8', 'replace')
+
+
+def parse_message(raw):
+    """
+    Parse one raw RFC 822 message into plain data.
+
+    Never raises: a message that cannot be parsed comes back as
+    {'message_id': ..., 'error': ...} so one bad message cannot stop a run.
+    The return value has to be picklable.
+    """
+    fallback_id = 'sha256:' + hashlib.sha256(raw).hexdigest()
+    try:
+        msg = BytesParser(policy=policy.default).parsebytes(raw)
+        message_id = (msg.get('Message-ID') or '').strip() or fallback_id
+
+        name, address = parseaddr(str(msg.get('From', '')))
+        references = _message_ids(str(msg.get('In-Reply-To', ''))) + _message_ids(str(msg.get('References', '')))
+
+        body_part = msg.get_body(preferencelist=('plain', 'html'))
+        body = _text(body_part).strip() if body_part is not None else ''
+
+        attachments = []
+        for part in msg.iter_attachments():
+            payload = part.get_payload(decode=True)
+            if payload:
+                attachments.append((part.get_filename() or 'attachment', payload))
+
+        subject = str(msg.get('Subject', '')).strip()
+        token = INCIDENT_TOKEN.search(subject)
+    except Exception as e:
+        return {'message_id': fallback_id, 'error': f'{type(e).__name__}: {e}'}
+    return {
+        'message_id': message_id[:255],
+        'references': references,
+        'incident_ref': int(token.group(1)) if token else None,
+        'subject': subject,
+        'from_name': name,
+        'from_email': address.lower(),
+        'body': body,
+        'attachments': attachments,
+    }
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from reports.routing import rebalance_unassigned, recount_loads
+
+
+class Command(BaseCommand):
+    help = 'Assign every open, unassigned incident to the least-loaded eligible IT Staff member.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recount', action='store_true',
+                            help='Rebuild agent load counters from the incident table first')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            recount_loads()
+            self.stdout.write('Agent load counters rebuilt.')
+        summary = rebalance_unassigned()
+        self.stdout.write(self.style.SUCCESS(
+            f"Assigned {summary['assigned']} of {summary['queued']} unassigned incidents."
+        ))
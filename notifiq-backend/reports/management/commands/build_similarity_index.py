@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from reports.models import Incident
+from reports.similarity import index_incidents
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the near-duplicate (MinHash LSH) index for all incidents.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        batch, total = [], 0
+        for incident in Incident.objects.only('id', 'title', 'description').iterator(chunk_size=batch_size):
+            batch.append(incident)
+            if len(batch) >= batch_size:
+                index_incidents(batch)
+                total += len(batch)
+                batch = []
+        index_incidents(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} incidents.'))
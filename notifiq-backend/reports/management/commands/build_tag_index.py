@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from reports.models import Incident
+from reports.tagging import sync_tags
+
+
+class Command(BaseCommand):
+    help = 'Backfill the normalized tag index from Incident.tags.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        batch, total = [], 0
+        for incident in Incident.objects.only('id', 'tags').iterator(chunk_size=batch_size):
+            batch.append(incident)
+            if len(batch) >= batch_size:
+                sync_tags(batch)
+                total += len(batch)
+                batch = []
+        sync_tags(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed tags for {total} incidents.'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.importers import import_incidents, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Stream incidents from a CSV or XLSX export into the database in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--default-status', default='Open', help='Status label used when a row has none')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as f:
+                summary = import_incidents(
+                    f, path,
+                    batch_size=max(options['batch_size'], 1),
+                    default_status=options['default_status'],
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if summary['errors_truncated']:
+            self.stderr.write(f"... {summary['failed'] - len(summary['errors'])} more errors not shown")
+        if summary['aborted_at_line']:
+            self.stderr.write(f"Stopped reading the file at line {summary['aborted_at_line']}; rows before it were imported.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} incidents, {summary['failed']} rows failed."
+        ))
@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.email_ingest import ingest_mailbox, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Create incidents (and thread replies onto existing ones) from a Maildir directory or mbox file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Maildir directory or mbox file')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Parser processes (default: CPU count, 1 parses in-process)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        summary = ingest_mailbox(path, workers=options['workers'], batch_size=max(options['batch_size'], 1))
+        for error in summary['errors']:
+            self.stderr.write(f"{error['message_id']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {summary['messages']} messages in {summary['seconds']}s "
+            f"({summary['messages_per_second']} msg/s): {summary['created']} new incidents, "
+            f"{summary['threaded']} replies threaded, {summary['attachments']} attachments, "
+            f"{summary['duplicates']} duplicates skipped, {summary['failed']} failed to parse."
+        ))
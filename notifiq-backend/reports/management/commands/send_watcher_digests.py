@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.watchers import send_watcher_digests, DEFAULT_WINDOW_MINUTES
+
+
+class Command(BaseCommand):
+    help = 'Email each watcher one digest of the ticket changes queued for them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_MINUTES,
+                            help='Minutes to let changes accumulate before a recipient is mailed')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running and send every N seconds (0 sends once and exits)')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = send_watcher_digests(window_minutes=options['window'])
+            for email, count in summary['coalesced'].items():
+                self.stdout.write(f'{email}: {count} changes in 1 email')
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent {summary['emails']} digests covering {summary['changes']} changes."
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.asset_sync import sync_assets, DEFAULT_BATCH_SIZE
+from reports.importers import iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Reconcile assets against an inventory feed (.json, .csv or .xlsx) keyed by tag.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the inventory feed')
+        parser.add_argument('--retire-missing', action='store_true',
+                            help='Set end_of_life to today for tagged assets absent from the feed')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as f:
+                if os.path.splitext(path)[1].lower() == '.json':
+                    records = json.load(f)
+                    if isinstance(records, dict):
+                        records = records.get('assets', [])
+                else:
+                    records = iter_rows(f, path)
+                summary = sync_assets(
+                    records,
+                    retire_missing=options['retire_missing'],
+                    dry_run=options['dry_run'],
+                    batch_size=max(options['batch_size'], 1),
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Record {error['index']} ({error['tag']}): {error['errors']}")
+        prefix = '[dry run] ' if summary['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Created {summary['created']}, updated {summary['updated']}, "
+            f"unchanged {summary['unchanged']}, retired {summary['retired']}, failed {summary['failed']}."
+        ))
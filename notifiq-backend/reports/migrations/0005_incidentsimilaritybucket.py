@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_inboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentSimilarityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('incident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_buckets', to='reports.incident')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'band'], name='reports_inc_bucket_b2534c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_incidentsimilaritybucket'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_count', models.IntegerField(db_index=True, default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='agent_load', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssignmentRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('group', models.CharField(blank=True, max_length=50)),
+                ('category', models.CharField(blank=True, max_length=50)),
+                ('priority', models.CharField(blank=True, max_length=50)),
+                ('order', models.PositiveIntegerField(default=0, help_text='Lower numbers are checked first')),
+                ('is_active', models.BooleanField(default=True)),
+                ('agents', models.ManyToManyField(blank=True, help_text='IT Staff members eligible under this rule. Leave empty to use all IT Staff.', related_name='assignment_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['order', 'id'],
+            },
+        ),
+    ]
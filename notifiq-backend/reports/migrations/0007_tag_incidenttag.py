@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_assignmentrule_agentload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IncidentTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('incident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='reports.incident')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incident_links', to='reports.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'incident'], name='reports_inc_tag_id_8cbd79_idx')],
+                'constraints': [models.UniqueConstraint(fields=('incident', 'tag'), name='unique_incident_tag')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_tag_incidenttag'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentWatcher',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('incident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watchers', to='reports.incident')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='watched_incidents', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WatcherEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watcher_events', to='reports.activitylog')),
+                ('watcher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='reports.incidentwatcher')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='incidentwatcher',
+            constraint=models.UniqueConstraint(fields=('incident', 'email'), name='unique_incident_watcher'),
+        ),
+        migrations.AddIndex(
+            model_name='watcherevent',
+            index=models.Index(fields=['sent_at', 'created_at'], name='reports_wat_sent_at_b7e30a_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:08
+
+import re
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import migrations
+
+# Frozen copy of reports.watchers.watcher_lookup/parse_watching_by as they were when
+# this migration was written; later changes to the app code must not alter it.
+SEPARATORS = re.compile(r'[,;\n]+')
+
+
+def user_lookup(users):
+    lookup = {}
+    for pk, username, email, first, last in users:
+        for key in (username, email, f'{first} {last}'.strip()):
+            if key:
+                lookup.setdefault(key.lower(), (pk, email))
+    return lookup
+
+
+def parse_watching_by(text, lookup):
+    watchers, seen = [], set()
+    for entry in SEPARATORS.split(text or ''):
+        entry = entry.strip()
+        if not entry:
+            continue
+        user_id, email = lookup.get(entry.lower(), (None, None))
+        email = (email or entry).strip().lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            continue
+        if email in seen:
+            continue
+        seen.add(email)
+        watchers.append((user_id, email))
+    return watchers
+
+
+def copy_watching_by(apps, schema_editor):
+    """Turn each entry of watching_by into an IncidentWatcher, using the same rules as the importer."""
+    Incident = apps.get_model('reports', 'Incident')
+    IncidentWatcher = apps.get_model('reports', 'IncidentWatcher')
+    User = apps.get_model('auth', 'User')
+
+    lookup = user_lookup(User.objects.values_list('id', 'username', 'email', 'first_name', 'last_name'))
+
+    watchers = [
+        IncidentWatcher(incident_id=incident_id, user_id=user_id, email=email)
+        for incident_id, watching_by in Incident.objects.exclude(watching_by='').values_list('id', 'watching_by').iterator()
+        for user_id, email in parse_watching_by(watching_by, lookup)
+    ]
+    IncidentWatcher.objects.bulk_create(watchers, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_incidentwatcher_watcherevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_watching_by, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-19 16:20
+
+from django.db import migrations
+from django.db.models import Count
+
+# Mirrors reports.routing.CLOSED_STATUSES; migrations must not import app code that may change.
+CLOSED_STATUSES = ('Resolved', 'Closed')
+
+
+def backfill_agent_loads(apps, schema_editor):
+    """Count each agent's open incidents so existing assignments are part of the load."""
+    Incident = apps.get_model('reports', 'Incident')
+    AgentLoad = apps.get_model('reports', 'AgentLoad')
+
+    counts = (
+        Incident.objects.filter(agent__isnull=False)
+        .exclude(status__name__in=CLOSED_STATUSES)
+        .values_list('agent_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    AgentLoad.objects.bulk_create(
+        [AgentLoad(user_id=user_id, open_count=n) for user_id, n in counts],
+        batch_size=1000, update_conflicts=True, unique_fields=['user'], update_fields=['open_count'],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_agent_loads, migrations.RunPython.noop),
+    ]
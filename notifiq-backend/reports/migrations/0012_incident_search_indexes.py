@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:05
+
+from django.db import migrations
+
+# (index name, column) for the IncidentAdmin search fields. Django's istartswith and
+# iexact lookups are case-insensitive, so a plain b-tree index cannot serve them:
+# SQLite needs a NOCASE index for its LIKE optimisation, PostgreSQL an UPPER()
+# expression index matching the SQL Django generates.
+SEARCH_INDEXES = [
+    ('reports_inc_title_ci_idx', 'title'),
+    ('reports_inc_req_name_ci_idx', 'requester_name'),
+    ('reports_inc_req_email_ci_idx', 'requester_email'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    for name, column in SEARCH_INDEXES:
+        if vendor == 'sqlite':
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {quote(name)} ON "reports_incident" ({quote(column)} COLLATE NOCASE)'
+            )
+        elif vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {quote(name)} ON "reports_incident" '
+                f'(UPPER({quote(column)}::text) text_pattern_ops)'
+            )
+    if vendor == 'sqlite':
+        # Without statistics SQLite prefers walking the primary key for the changelist's
+        # ORDER BY id over the search indexes. A sampled ANALYZE keeps this cheap.
+        schema_editor.execute('PRAGMA analysis_limit = 1000')
+        schema_editor.execute('ANALYZE "reports_incident"')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        for name, _ in SEARCH_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0011_backfill_agentload'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0012_incident_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignmentrule',
+            name='order',
+            field=models.PositiveIntegerField(default=0, help_text='The matching rule with the lowest number wins, then the most specific one'),
+        ),
+    ]
@@ -15,9 +15,9 @@ class Incident(models.Model):
     description = models.TextField()
     status = models.ForeignKey(StatusLabel, on_delete=models.SET_NULL, null=True, blank=True)
     priority = models.CharField(max_length=50, default='Medium')
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(auto_now_add=True, db_index=True)
     requester_name = models.CharField(max_length = 100, blank = True, help_text = "Name of the person requesting help")
-    requester_email = models.EmailField(max_length = 100, blank = True)
+    requester_email = models.EmailField(max_length = 100, blank = True, db_index=True)
 
     agent = models.ForeignKey(
         User, 
@@ -50,7 +50,10 @@ class Incident(models.Model):
 class Attachment(models.Model):
     incident = models.ForeignKey(Incident, related_name='attachments', on_delete=models.CASCADE)
     file = models.FileField(upload_to='attachments/')
-    uploaded_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.file.name
 
 class Asset(models.Model):
     name = models.CharField(max_length=200)
@@ -73,7 +76,7 @@ class Asset(models.Model):
     )
 
     def __str__(self):
-        return self.file.name
+        return self.name
     
 class ActivityLog(models.Model):
     incident = models.ForeignKey(Incident, related_name='activity_log', on_delete=models.CASCADE)
@@ -82,14 +85,103 @@ class ActivityLog(models.Model):
     old_value = models.CharField(max_length=100, blank=True, null=True)
     new_value = models.CharField(max_length=100, blank=True, null=True)
     note = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         ordering = ['timestamp'] 
 
     def __str__(self):
-        return f'{self.activity_type} on Incident {self.incident.id}'
+        return f'{self.activity_type} on Incident {self.incident_id}'
     
+class InboundEmail(models.Model):
+    # Message-ID header (or a hash of the raw message) so re-running ingestion never duplicates
+    message_id = models.CharField(max_length=255, unique=True)
+    incident = models.ForeignKey(Incident, related_name='inbound_emails', on_delete=models.CASCADE)
+    sender = models.CharField(max_length=255, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.message_id
+
+class IncidentSimilarityBucket(models.Model):
+    # One row per MinHash LSH band; incidents sharing a (band, bucket) pair are duplicate candidates
+    incident = models.ForeignKey(Incident, related_name='similarity_buckets', on_delete=models.CASCADE)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['bucket', 'band'])]
+
+class AssignmentRule(models.Model):
+    # Blank group/category/priority match anything. Of the active rules that match, the lowest
+    # order wins; on equal order the rule with the most non-blank fields wins.
+    name = models.CharField(max_length=100)
+    group = models.CharField(max_length=50, blank=True)
+    category = models.CharField(max_length=50, blank=True)
+    priority = models.CharField(max_length=50, blank=True)
+    agents = models.ManyToManyField(
+        User,
+        blank=True,
+        related_name='assignment_rules',
+        help_text="IT Staff members eligible under this rule. Leave empty to use all IT Staff."
+    )
+    order = models.PositiveIntegerField(
+        default=0,
+        help_text="The matching rule with the lowest number wins, then the most specific one"
+    )
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['order', 'id']
+
+    def __str__(self):
+        return self.name
+
+class AgentLoad(models.Model):
+    # Running count of open incidents per agent, kept in step by reports.signals
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='agent_load')
+    open_count = models.IntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f'{self.user.username}: {self.open_count}'
+
+class Tag(models.Model):
+    # Normalized (lowercased) tag names mirrored from Incident.tags for indexed filtering
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+class IncidentTag(models.Model):
+    incident = models.ForeignKey(Incident, related_name='tag_links', on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, related_name='incident_links', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['incident', 'tag'], name='unique_incident_tag')]
+        indexes = [models.Index(fields=['tag', 'incident'])]
+
+class IncidentWatcher(models.Model):
+    # Replaces the free-text Incident.watching_by; email is what digests are grouped by
+    incident = models.ForeignKey(Incident, related_name='watchers', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='watched_incidents')
+    email = models.EmailField(max_length=254)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['incident', 'email'], name='unique_incident_watcher')]
+
+    def __str__(self):
+        return f'{self.email} watching {self.incident_id}'
+
+class WatcherEvent(models.Model):
+    # Outbox row per (watcher, change); the digest worker sends and stamps them in bulk
+    watcher = models.ForeignKey(IncidentWatcher, related_name='events', on_delete=models.CASCADE)
+    activity = models.ForeignKey(ActivityLog, related_name='watcher_events', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['sent_at', 'created_at'])]
+
 class UserNote(models.Model):
     user_profile = models.ForeignKey(User, related_name='notes_about_user', on_delete=models.CASCADE) # The user the note is about
     author = models.ForeignKey(User, related_name='authored_user_notes', on_delete=models.CASCADE) # The IT staff member who wrote the note
@@ -0,0 +1,147 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Incident, StatusLabel, AssignmentRule, AgentLoad, ActivityLog
+
+# Incidents in these statuses no longer count towards an agent's load.
+CLOSED_STATUSES = ('Resolved', 'Closed')
+
+_closed_status_ids = None
+
+
+def closed_status_ids():
+    global _closed_status_ids
+    if _closed_status_ids is None:
+        _closed_status_ids = frozenset(
+            StatusLabel.objects.filter(name__in=CLOSED_STATUSES).values_list('id', flat=True)
+        )
+    return _closed_status_ids
+
+
+def clear_status_cache():
+    global _closed_status_ids
+    _closed_status_ids = None
+
+
+def counts_towards_load(agent_id, status_id):
+    return agent_id is not None and status_id not in closed_status_ids()
+
+
+def adjust_loads(deltas):
+    """Apply {user_id: delta} to the AgentLoad counters without reading them first."""
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        updated = AgentLoad.objects.filter(user_id=user_id).update(open_count=F('open_count') + delta)
+        if not updated:
+            AgentLoad.objects.create(user_id=user_id, open_count=max(delta, 0))
+
+
+def recount_loads(user_ids=None):
+    """Rebuild counters from the incident table, for backfills and after bulk writes."""
+    open_incidents = Incident.objects.filter(agent__isnull=False).exclude(status_id__in=closed_status_ids())
+    if user_ids is not None:
+        open_incidents = open_incidents.filter(agent_id__in=user_ids)
+    counts = dict(open_incidents.values_list('agent_id').annotate(n=Count('id')).order_by())
+    if user_ids is None:
+        user_ids = set(counts) | set(AgentLoad.objects.values_list('user_id', flat=True))
+    loads = [AgentLoad(user_id=user_id, open_count=counts.get(user_id, 0)) for user_id in user_ids]
+    AgentLoad.objects.bulk_create(
+        loads, update_conflicts=True, unique_fields=['user'], update_fields=['open_count'],
+    )
+
+
+class Router:
+    """
+    Picks the least-loaded eligible IT Staff member for each incident.
+
+    Rules, staff and load counters are read once when the router is built, and
+    each pick bumps the in-memory count, so routing a batch costs no queries
+    per incident.
+    """
+
+    def __init__(self):
+        self.rules = list(AssignmentRule.objects.filter(is_active=True).prefetch_related('agents'))
+        self.staff = set(
+            User.objects.filter(groups__name='IT Staff', is_active=True).values_list('id', flat=True)
+        )
+        self.loads = dict(AgentLoad.objects.filter(user_id__in=self.staff).values_list('user_id', 'open_count'))
+        self.deltas = Counter()
+
+    @staticmethod
+    def _matches(rule, incident):
+        for field in ('group', 'category', 'priority'):
+            expected = getattr(rule, field)
+            if expected and expected.lower() != (getattr(incident, field) or '').lower():
+                return False
+        return True
+
+    @staticmethod
+    def _specificity(rule):
+        return sum(1 for field in ('group', 'category', 'priority') if getattr(rule, field))
+
+    def rule_for(self, incident):
+        # Lowest order first; specificity only breaks ties, so admins can put a broad rule first
+        matching = [rule for rule in self.rules if self._matches(rule, incident)]
+        if not matching:
+            return None
+        return min(matching, key=lambda rule: (rule.order, -self._specificity(rule), rule.id))
+
+    def pick(self, incident):
+        """Return the chosen agent id (or None) and count the assignment in memory."""
+        rule = self.rule_for(incident)
+        if rule is None:
+            return None
+        agents = {agent.id for agent in rule.agents.all()}
+        # A rule without agents routes to all staff; a rule naming agents never falls back.
+        pool = agents & self.staff if agents else self.staff
+        if not pool:
+            return None
+        agent_id = min(pool, key=lambda user_id: (self.loads.get(user_id, 0), user_id))
+        if counts_towards_load(agent_id, incident.status_id):
+            self.loads[agent_id] = self.loads.get(agent_id, 0) + 1
+            self.deltas[agent_id] += 1
+        return agent_id
+
+    def assign(self, incidents):
+        """Set agent_id on unassigned incidents in memory; callers persist them."""
+        assigned = []
+        for incident in incidents:
+            if incident.agent_id is None:
+                incident.agent_id = self.pick(incident)
+                if incident.agent_id is not None:
+                    assigned.append(incident)
+        return assigned
+
+    def commit_loads(self):
+        """Persist load changes for writes that bypass post_save (bulk_create/bulk_update)."""
+        adjust_loads(self.deltas)
+        self.deltas.clear()
+
+
+def rebalance_unassigned(user=None, batch_size=1000):
+    """Assign every open, unassigned incident in one transaction, oldest first."""
+    with transaction.atomic():
+        router = Router()
+        queue = list(
+            Incident.objects.select_for_update()
+            .filter(agent__isnull=True)
+            .exclude(status_id__in=closed_status_ids())
+            .only('id', 'group', 'category', 'priority', 'status_id', 'agent_id')
+            .order_by('submitted_at', 'id')
+        )
+        assigned = router.assign(queue)
+        Incident.objects.bulk_update(assigned, ['agent'], batch_size=batch_size)
+        router.commit_loads()
+        usernames = dict(User.objects.filter(id__in=router.staff).values_list('id', 'username'))
+        ActivityLog.objects.bulk_create([
+            ActivityLog(
+                incident_id=incident.id, user=user, activity_type='Auto Assigned',
+                old_value=None, new_value=usernames.get(incident.agent_id),
+            )
+            for incident in assigned
+        ], batch_size=batch_size)
+    return {'queued': len(queue), 'assigned': len(assigned), 'unassigned': len(queue) - len(assigned)}
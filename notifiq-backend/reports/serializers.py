@@ -81,6 +81,14 @@ class IncidentSerializer(serializers.ModelSerializer):
             'attachments', 'activity_log', 'status_id', 'due_date', 'first_response_at', 'resolved_at'
         ]
 
+class SimilarIncidentSerializer(serializers.ModelSerializer):
+    status = StatusLabelSerializer(read_only=True)
+    score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Incident
+        fields = ['id', 'title', 'status', 'priority', 'submitted_at', 'score']
+
 class AssetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Asset
@@ -0,0 +1,67 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Incident, StatusLabel
+from .routing import adjust_loads, clear_status_cache, counts_towards_load
+from .similarity import index_incidents
+from .tagging import sync_tags
+
+_UNTRACKED = object()
+
+
+def _load_key(agent_id, status_id):
+    return agent_id if counts_towards_load(agent_id, status_id) else None
+
+
+@receiver(post_init, sender=Incident)
+def remember_assignment(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not fetched one row at a time.
+    instance._tracked_assignment = (
+        instance.__dict__.get('agent_id', _UNTRACKED),
+        instance.__dict__.get('status_id', _UNTRACKED),
+    )
+
+
+@receiver(post_save, sender=Incident)
+def update_similarity_index(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or {'title', 'description'} & set(update_fields):
+        index_incidents([instance])
+
+
+@receiver(post_save, sender=Incident)
+def update_tag_index(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or 'tags' in update_fields:
+        sync_tags([instance])
+
+
+@receiver(post_save, sender=Incident)
+def update_agent_load(sender, instance, created, **kwargs):
+    old_agent, old_status = instance._tracked_assignment
+    if not created and _UNTRACKED in (old_agent, old_status):
+        return
+    old = None if created else _load_key(old_agent, old_status)
+    new = _load_key(instance.agent_id, instance.status_id)
+    if old != new:
+        deltas = {}
+        if old is not None:
+            deltas[old] = -1
+        if new is not None:
+            deltas[new] = deltas.get(new, 0) + 1
+        adjust_loads(deltas)
+    instance._tracked_assignment = (instance.agent_id, instance.status_id)
+
+
+@receiver(post_delete, sender=Incident)
+def release_agent_load(sender, instance, **kwargs):
+    old_agent, old_status = instance._tracked_assignment
+    if _UNTRACKED in (old_agent, old_status):
+        return
+    old = _load_key(old_agent, old_status)
+    if old is not None:
+        adjust_loads({old: -1})
+
+
+@receiver(post_save, sender=StatusLabel)
+@receiver(post_delete, sender=StatusLabel)
+def reset_closed_statuses(sender, **kwargs):
+    clear_status_cache()
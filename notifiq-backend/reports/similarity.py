@@ -0,0 +1,119 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q
+from rapidfuzz import fuzz
+
+from .models import Incident, IncidentSimilarityBucket
+
+# 32 MinHash permutations split into 16 bands of 2 rows. Two tickets land in the
+# same bucket for at least one band with high probability once their trigram
+# Jaccard similarity passes roughly (1/16) ** (1/2) = 0.25.
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_CANDIDATES = 200
+DEFAULT_THRESHOLD = 60
+DEFAULT_LIMIT = 10
+# Long descriptions are mostly logs and signatures; the start carries the meaning.
+MAX_TEXT = 2000
+
+# Universal hashing (a * x + b) mod p with p < 2**31, so a * x stays within uint64
+# for 32-bit shingle hashes and the whole signature is one vectorised expression.
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240626)
+_A = _rng.integers(1, int(_PRIME), size=(NUM_PERM, 1), dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), size=(NUM_PERM, 1), dtype=np.uint64)
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(title, description):
+    text = f'{title or ""} {description or ""}'[:MAX_TEXT].lower()
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def shingles(text):
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def minhash(shingle_set):
+    if not shingle_set:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    return ((_A * hashes + _B) % _PRIME).min(axis=1).tolist()
+
+
+def band_buckets(title, description):
+    """Return the (band, bucket) pairs for a ticket's text, or [] if it has no text."""
+    signature = minhash(shingles(normalize(title, description)))
+    if signature is None:
+        return []
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+
+def index_incidents(incidents):
+    """Replace the LSH buckets for the given incidents with two queries."""
+    incidents = [i for i in incidents if i.pk is not None]
+    if not incidents:
+        return
+    rows = [
+        IncidentSimilarityBucket(incident_id=incident.pk, band=band, bucket=bucket)
+        for incident in incidents
+        for band, bucket in band_buckets(incident.title, incident.description)
+    ]
+    with transaction.atomic():
+        IncidentSimilarityBucket.objects.filter(incident_id__in=[i.pk for i in incidents]).delete()
+        IncidentSimilarityBucket.objects.bulk_create(rows, batch_size=1000)
+
+
+def candidate_ids(title, description, exclude_id=None, incidents=None):
+    """
+    Incident ids sharing at least one LSH bucket, most shared bands first.
+    Pass `incidents` to restrict candidates to a visible queryset before the
+    MAX_CANDIDATES cut, so other users' tickets cannot crowd out the caller's.
+    """
+    buckets = band_buckets(title, description)
+    if not buckets:
+        return []
+    match = Q()
+    for band, bucket in buckets:
+        match |= Q(band=band, bucket=bucket)
+    queryset = IncidentSimilarityBucket.objects.filter(match)
+    if exclude_id is not None:
+        queryset = queryset.exclude(incident_id=exclude_id)
+    if incidents is not None:
+        queryset = queryset.filter(incident_id__in=incidents.order_by().values('id'))
+    queryset = queryset.values('incident_id').annotate(hits=Count('id')).order_by('-hits')[:MAX_CANDIDATES]
+    return [row['incident_id'] for row in queryset]
+
+
+def find_similar(title, description, queryset=None, exclude_id=None, threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT):
+    """
+    Look up near-duplicates through the bucket index, then re-rank the small
+    candidate set with RapidFuzz. Returns (incident, score) pairs, best first.
+    """
+    ids = candidate_ids(title, description, exclude_id=exclude_id, incidents=queryset)
+    if not ids:
+        return []
+    if queryset is None:
+        queryset = Incident.objects.all()
+    candidates = queryset.filter(id__in=ids).select_related('status').order_by()
+    query_text = normalize(title, description)
+    scored = []
+    for incident in candidates:
+        score = fuzz.token_set_ratio(query_text, normalize(incident.title, incident.description))
+        if score >= threshold:
+            scored.append((incident, round(score, 1)))
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return scored[:limit]
@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Tag, IncidentTag
+
+
+def normalize_tag(value):
+    return str(value).strip().lower()[:100]
+
+
+def parse_tag_param(value):
+    """Split a comma separated ?tags= value into normalized names."""
+    return sorted({normalize_tag(t) for t in (value or '').split(',') if t.strip()})
+
+
+def incident_tag_names(incident):
+    tags = incident.tags if isinstance(incident.tags, list) else []
+    return {normalize_tag(t) for t in tags if isinstance(t, str) and t.strip()}
+
+
+def sync_tags(incidents):
+    """
+    Make the IncidentTag links for `incidents` match their `tags` JSON.
+
+    Works on any number of incidents with a fixed number of queries, so it is
+    used both from post_save and after bulk_create.
+    """
+    wanted = {incident.pk: incident_tag_names(incident) for incident in incidents if incident.pk is not None}
+    if not wanted:
+        return
+    names = set().union(*wanted.values())
+    with transaction.atomic():
+        if names:
+            Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id')) if names else {}
+        wanted_links = {(incident_id, tag_ids[name]) for incident_id, tag_names in wanted.items() for name in tag_names}
+        current = {}
+        for link_id, incident_id, tag_id in IncidentTag.objects.filter(incident_id__in=wanted).values_list(
+            'id', 'incident_id', 'tag_id'
+        ):
+            current[(incident_id, tag_id)] = link_id
+
+        stale = [link_id for key, link_id in current.items() if key not in wanted_links]
+        for start in range(0, len(stale), 500):
+            IncidentTag.objects.filter(id__in=stale[start:start + 500]).delete()
+        IncidentTag.objects.bulk_create(
+            [IncidentTag(incident_id=i, tag_id=t) for i, t in wanted_links - current.keys()],
+            batch_size=1000, ignore_conflicts=True,
+        )
+
+
+def filter_any_tags(queryset, names):
+    return queryset.filter(id__in=IncidentTag.objects.filter(tag__name__in=names).values('incident_id'))
+
+
+def filter_all_tags(queryset, names):
+    matching = (
+        IncidentTag.objects.filter(tag__name__in=names)
+        .values('incident_id')
+        .annotate(matched=Count('tag_id'))
+        .filter(matched=len(names))
+        .values('incident_id')
+    )
+    return queryset.filter(id__in=matching)
+
+
+def count_tags(queryset):
+    """Tag facet for the incidents in `queryset`, most used first."""
+    return list(
+        IncidentTag.objects.filter(incident__in=queryset.order_by().values('id'))
+        .values('tag__name')
+        .annotate(count=Count('incident_id'))
+        .order_by('-count', 'tag__name')
+    )
@@ -1,3 +1,619 @@
-from django.test import TestCase
+import importlib
+import io
+import mailbox
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import skipUnless
+from datetime import timedelta
+from email.message import EmailMessage
 
+from django.apps import apps
+from django.contrib.auth.models import User, Group
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
 
+from .asset_sync import sync_assets
+from .email_ingest import ingest_mailbox
+from .mail_parsing import parse_message
+from .models import (
+    Incident, StatusLabel, ActivityLog, Attachment, Asset, InboundEmail, AssignmentRule, AgentLoad,
+    IncidentWatcher, WatcherEvent, IncidentTag,
+)
+from .routing import Router
+from .similarity import MAX_CANDIDATES, index_incidents
+from .watchers import parse_watching_by, send_watcher_digests, watcher_lookup
+
+
+def make_email(message_id, subject, sender, body, references=None, attachment=None):
+    msg = EmailMessage()
+    msg['Message-ID'] = message_id
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = 'help@example.com'
+    if references:
+        msg['In-Reply-To'] = references[-1]
+        msg['References'] = ' '.join(references)
+    msg.set_content(body)
+    if attachment:
+        msg.add_attachment(attachment, maintype='application', subtype='octet-stream', filename='log.bin')
+    return msg
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Changelist pages must not issue a query per row."""
+
+    MAX_QUERIES = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        staff = Group.objects.create(name='IT Staff')
+        cls.agents = []
+        for i in range(3):
+            agent = User.objects.create_user(f'agent{i}', f'agent{i}@example.com', 'password')
+            agent.groups.add(staff)
+            cls.agents.append(agent)
+        cls.statuses = [StatusLabel.objects.create(name=name) for name in ('Open', 'In Progress', 'Closed')]
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def add_rows(self, count):
+        start = Incident.objects.count()
+        for i in range(start, start + count):
+            incident = Incident.objects.create(
+                title=f'Ticket {i}', description='Printer is offline',
+                status=self.statuses[i % 3], agent=self.agents[i % 3],
+            )
+            ActivityLog.objects.create(incident=incident, user=self.agents[i % 3], activity_type='Note Added', note='x')
+            Attachment.objects.create(incident=incident, file=f'attachments/file{i}.txt')
+            Asset.objects.create(name=f'Laptop {i}', tag=f'TAG-{i}', asset_type='Laptop', managed_by=self.agents[i % 3])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.add_rows(2)
+        few = self.count_queries(url)
+        self.add_rows(20)
+        many = self.count_queries(url)
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, self.MAX_QUERIES)
+
+    def test_incident_changelist(self):
+        self.assert_constant_queries(reverse('admin:reports_incident_changelist'))
+
+    def test_incident_changelist_search(self):
+        self.assert_constant_queries(reverse('admin:reports_incident_changelist') + '?q=1')
+
+    def test_activitylog_changelist(self):
+        self.assert_constant_queries(reverse('admin:reports_activitylog_changelist'))
+
+    def test_attachment_changelist(self):
+        self.assert_constant_queries(reverse('admin:reports_attachment_changelist'))
+
+    def test_asset_changelist(self):
+        self.assert_constant_queries(reverse('admin:reports_asset_changelist'))
+
+    @skipUnless(connection.vendor == 'sqlite', 'checks the SQLite query plan')
+    def test_incident_search_uses_indexes(self):
+        Incident.objects.bulk_create([
+            Incident(title=f'Ticket {i}', description='d', requester_name=f'User {i}', requester_email=f'user{i}@example.com')
+            for i in range(2000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        for term in ('Ticket 1', 'user7@example.com', '42'):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('admin:reports_incident_changelist'), {'q': term})
+            searches = [q['sql'] for q in ctx.captured_queries if 'LIKE' in q['sql'] and 'reports_incident' in q['sql']]
+            self.assertTrue(searches)
+            for sql in searches:
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertNotIn('SCAN reports_incident', plan, sql)
+
+    def test_incident_change_form_uses_autocomplete(self):
+        self.add_rows(1)
+        incident = Incident.objects.get()
+        response = self.client.get(reverse('admin:reports_incident_change', args=[incident.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'admin-autocomplete')
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class EmailIngestTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        StatusLabel.objects.create(name='Open')
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.path = os.path.join(self.dir, 'inbox')
+        self.box = mailbox.Maildir(self.path)
+
+    def ingest(self):
+        return ingest_mailbox(self.path, workers=1)
+
+    def test_replies_thread_onto_the_original_incident(self):
+        self.box.add(make_email('<a@x>', 'Printer down', 'Bob <bob@example.com>', 'help', attachment=b'data'))
+        self.box.add(make_email('<b@x>', 'Re: Printer down', 'Bob <bob@example.com>', 'still', references=['<a@x>']))
+
+        summary = self.ingest()
+
+        self.assertEqual((summary['created'], summary['threaded'], summary['attachments']), (1, 1, 1))
+        incident = Incident.objects.get()
+        self.assertEqual((incident.source, incident.requester_email, incident.requester_name),
+                         ('email', 'bob@example.com', 'Bob'))
+        self.assertEqual(incident.status.name, 'Open')
+        self.assertEqual(list(incident.activity_log.values_list('note', flat=True)), ['still'])
+        self.assertEqual(incident.attachments.count(), 1)
+
+    def test_subject_token_threads_across_runs(self):
+        self.box.add(make_email('<a@x>', 'VPN', 'z@example.com', 'vpn'))
+        self.ingest()
+        incident = Incident.objects.get()
+        self.box.add(make_email('<c@x>', f'Re: [#{incident.id}] VPN', 'z@example.com', 'more'))
+
+        self.assertEqual(self.ingest()['threaded'], 1)
+        self.assertEqual(Incident.objects.count(), 1)
+
+    def test_subject_token_from_a_stranger_opens_a_new_incident(self):
+        self.box.add(make_email('<a@x>', 'VPN', 'z@example.com', 'vpn'))
+        self.ingest()
+        incident = Incident.objects.get()
+        IncidentWatcher.objects.create(incident=incident, email='Watcher@Example.com')
+        self.box.add(make_email('<b@x>', f'Re: [#{incident.id}] VPN', 'watcher@example.com', 'seen it'))
+        self.box.add(make_email('<c@x>', f'[#{incident.id}] VPN', 'mallory@evil.test', 'spam'))
+
+        summary = self.ingest()
+
+        self.assertEqual((summary['created'], summary['threaded']), (1, 1))
+        self.assertEqual(list(incident.activity_log.values_list('note', flat=True)), ['seen it'])
+
+    def test_oversized_subject_token_is_ignored(self):
+        self.box.add(make_email('<a@x>', 'Help [#99999999999999999999]', 'z@example.com', 'help'))
+
+        self.assertEqual(self.ingest()['created'], 1)
+        self.assertEqual(self.ingest()['duplicates'], 1)
+
+    def test_rerun_is_idempotent(self):
+        self.box.add(make_email('<a@x>', 'Printer down', 'bob@example.com', 'help'))
+        self.box.add(make_email('<b@x>', 'Re: Printer down', 'bob@example.com', 'still', references=['<a@x>']))
+        self.ingest()
+
+        summary = self.ingest()
+
+        self.assertEqual((summary['created'], summary['threaded'], summary['duplicates']), (0, 0, 2))
+        self.assertEqual(Incident.objects.count(), 1)
+        self.assertEqual(ActivityLog.objects.count(), 1)
+        self.assertEqual(InboundEmail.objects.count(), 2)
+
+    def test_unparseable_message_does_not_stop_the_run(self):
+        bad = (b'Message-ID: <bad@x>\r\nFrom: a@example.com\r\nSubject: broken\r\n'
+               b'Content-Type: text/plain; charset="x-unknown-cs"\r\n\r\nbody\r\n')
+        self.box.add(bad)
+        self.box.add(make_email('<a@x>', 'Printer down', 'bob@example.com', 'help'))
+
+        summary = self.ingest()
+
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual(Incident.objects.get(title='broken').description, 'body')
+
+    def test_parser_module_does_not_import_django(self):
+        code = 'import sys, reports.mail_parsing; sys.exit("django" in sys.modules)'
+        result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)))
+        self.assertEqual(result.returncode, 0)
+
+    def test_parser_runs_in_spawned_workers(self):
+        raw = make_email('<a@x>', 'Printer down', 'bob@example.com', 'help').as_bytes()
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            parsed = list(pool.map(parse_message, [raw]))
+        self.assertEqual(parsed[0]['message_id'], '<a@x>')
+
+
+class IncidentImportTests(TestCase):
+
+    def setUp(self):
+        self.open = StatusLabel.objects.create(name='Open')
+        self.closed = StatusLabel.objects.create(name='Closed')
+        self.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.agent = User.objects.create_user('agent', 'Agent@Example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            '/api/incidents/import/', {'file': SimpleUploadedFile(name, content), **data}, format='multipart'
+        )
+
+    def test_rows_are_resolved_validated_and_reported(self):
+        content = (
+            'Title,Description,Status,Agent,Tags\n'
+            'one,d,closed,agent@example.com,"a, b"\n'
+            'two,,,,\n'
+            'three,d,Nope,,\n'
+            'four,d,,,\n'
+        ).encode()
+
+        response = self.upload('tickets.csv', content, batch_size=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 4])
+        one = Incident.objects.get(title='one')
+        self.assertEqual((one.status, one.agent, one.tags), (self.closed, self.agent, ['a', 'b']))
+        self.assertEqual(Incident.objects.get(title='four').status, self.open)
+
+    def test_invalid_encoding_is_rejected_before_anything_is_written(self):
+        content = b'title,description\n' + b'ok,fine\n' * 3000 + b'bad,\xff\n'
+
+        response = self.upload('tickets.csv', content, batch_size=100)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('line 3002', response.data['error'])
+        self.assertFalse(Incident.objects.exists())
+
+    def test_csv_error_mid_file_returns_partial_summary(self):
+        content = b'title,description\nok,fine\nbig,' + b'x' * 200000 + b'\nafter,row\n'
+
+        response = self.upload('tickets.csv', content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['aborted_at_line']), (1, 3))
+
+    def test_corrupt_workbook_is_a_bad_request(self):
+        response = self.upload('tickets.xlsx', b'not a zip file')
+        self.assertEqual(response.status_code, 400)
+
+
+class AgentLoadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.open = StatusLabel.objects.create(name='Open')
+        cls.closed = StatusLabel.objects.create(name='Closed')
+        staff = Group.objects.create(name='IT Staff')
+        cls.alice = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+        staff.user_set.add(cls.alice, cls.bob)
+
+    def load(self, user):
+        return AgentLoad.objects.filter(user=user).values_list('open_count', flat=True).first() or 0
+
+    def test_counters_follow_assign_close_reassign_and_delete(self):
+        incident = Incident.objects.create(title='t', description='d', status=self.open, agent=self.alice)
+        self.assertEqual((self.load(self.alice), self.load(self.bob)), (1, 0))
+
+        incident.status = self.closed
+        incident.save()
+        self.assertEqual(self.load(self.alice), 0)
+
+        incident.status = self.open
+        incident.save()
+        incident = Incident.objects.get(pk=incident.pk)
+        incident.agent = self.bob
+        incident.save()
+        self.assertEqual((self.load(self.alice), self.load(self.bob)), (0, 1))
+
+        Incident.objects.get(pk=incident.pk).delete()
+        self.assertEqual(self.load(self.bob), 0)
+
+    def test_rule_without_agents_uses_least_loaded_staff(self):
+        AssignmentRule.objects.create(name='all', category='Network')
+        Incident.objects.create(title='t', description='d', status=self.open, agent=self.alice)
+
+        incident = Incident(title='n', description='d', category='network', status=self.open)
+        self.assertEqual(Router().pick(incident), self.bob.id)
+
+    def test_rule_with_no_eligible_agents_does_not_fall_back(self):
+        contractor = User.objects.create_user('contractor', 'c@example.com', 'password')
+        rule = AssignmentRule.objects.create(name='restricted', category='Network')
+        rule.agents.add(contractor)
+
+        incident = Incident(title='n', description='d', category='Network', status=self.open)
+        self.assertIsNone(Router().pick(incident))
+
+    def test_lowest_order_wins_then_most_specific(self):
+        generic = AssignmentRule.objects.create(name='generic', order=0)
+        specific = AssignmentRule.objects.create(name='specific', category='Network', priority='High', order=1)
+        tie = AssignmentRule.objects.create(name='tie', category='Network', order=0)
+        incident = Incident(title='n', description='d', category='network', priority='High')
+
+        self.assertEqual(Router().rule_for(incident), tie)
+        tie.delete()
+        self.assertEqual(Router().rule_for(incident), generic)
+        generic.order = 2
+        generic.save()
+        self.assertEqual(Router().rule_for(incident), specific)
+
+    def test_migration_backfills_existing_assignments(self):
+        Incident.objects.create(title='a', description='d', status=self.open, agent=self.alice)
+        Incident.objects.create(title='b', description='d', status=self.open, agent=self.alice)
+        Incident.objects.create(title='c', description='d', status=self.closed, agent=self.bob)
+        AgentLoad.objects.all().delete()
+
+        migration = importlib.import_module('reports.migrations.0011_backfill_agentload')
+        migration.backfill_agent_loads(apps, None)
+
+        self.assertEqual((self.load(self.alice), self.load(self.bob)), (2, 0))
+
+
+class AssetSyncTests(TestCase):
+
+    def setUp(self):
+        self.root = User.objects.create_superuser('root', 'root@example.com', 'password')
+        Asset.objects.create(name='Laptop', tag='A1', asset_type='Laptop')
+        Asset.objects.create(name='Phone', tag='A2', asset_type='Phone')
+        Asset.objects.create(name='Old', tag='A3', asset_type='Server')
+        self.client = APIClient()
+        self.client.force_authenticate(self.root)
+
+    def test_feed_is_diffed_by_tag(self):
+        summary = sync_assets([
+            {'tag': 'A1', 'name': 'Laptop', 'asset_type': 'Laptop'},
+            {'tag': 'A2', 'name': 'Phone 2', 'asset_type': 'Phone', 'managed_by': 'ROOT'},
+            {'tag': 'A4', 'name': 'Desk', 'asset_type': 'Furniture', 'managed_by': 'Root@Example.com'},
+            {'tag': 'A5', 'name': 'Ghost', 'asset_type': 'Laptop', 'managed_by': 'nobody'},
+        ], retire_missing=True)
+
+        counts = {k: summary[k] for k in ('created', 'updated', 'unchanged', 'retired', 'failed')}
+        self.assertEqual(counts, {'created': 1, 'updated': 1, 'unchanged': 1, 'retired': 1, 'failed': 1})
+        phone = Asset.objects.get(tag='A2')
+        self.assertEqual((phone.name, phone.managed_by), ('Phone 2', self.root))
+        self.assertEqual(Asset.objects.get(tag='A4').managed_by, self.root)
+        self.assertIsNotNone(Asset.objects.get(tag='A3').end_of_life)
+        self.assertFalse(Asset.objects.filter(tag='A5').exists())
+
+    def test_blank_csv_cells_clear_nullable_fields(self):
+        Asset.objects.filter(tag='A1').update(end_of_life='2030-01-01', description='old')
+        path = os.path.join(tempfile.mkdtemp(), 'feed.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path), True)
+        with open(path, 'w') as f:
+            f.write('tag,name,asset_type,end_of_life,description\nA1,Laptop,Laptop,,\nA9,Dock,Dock,,\n')
+
+        out = io.StringIO()
+        call_command('sync_assets', path, stdout=out)
+
+        self.assertIn('Created 1, updated 1', out.getvalue())
+        self.assertEqual(
+            list(Asset.objects.filter(tag__in=['A1', 'A9']).values_list('end_of_life', 'description')),
+            [(None, None), (None, None)],
+        )
+
+    def test_blank_date_over_the_api(self):
+        response = self.client.post(
+            '/api/assets/sync/', [{'tag': 'A7', 'name': 'Tablet', 'asset_type': 'Tablet', 'end_of_life': ''}], format='json'
+        )
+        self.assertEqual((response.status_code, response.data['created']), (200, 1))
+
+    def test_dry_run_writes_nothing(self):
+        summary = sync_assets([{'tag': 'A9', 'name': 'New', 'asset_type': 'Laptop'}], dry_run=True)
+        self.assertEqual(summary['created'], 1)
+        self.assertFalse(Asset.objects.filter(tag='A9').exists())
+
+    def test_string_false_does_not_retire(self):
+        response = self.client.post(
+            '/api/assets/sync/', {'assets': [{'tag': 'A1'}], 'retire_missing': 'false'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['retired'], 0)
+        self.assertFalse(Asset.objects.filter(end_of_life__isnull=False).exists())
+
+    def test_unrecognised_flag_is_a_bad_request(self):
+        response = self.client.post('/api/assets/sync/', {'assets': [], 'dry_run': 'maybe'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class WatcherDigestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.open = StatusLabel.objects.create(name='Open')
+        cls.alice = User.objects.create_superuser('alice', 'alice@example.com', 'password', first_name='Alice', last_name='Ng')
+        cls.bob = User.objects.create_user('bob', 'bob@example.com', 'password')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_watching_by_parsing(self):
+        lookup = watcher_lookup(User.objects.values_list('id', 'username', 'email', 'first_name', 'last_name'))
+        parsed = parse_watching_by('bob; Alice Ng,\nBOB@example.com, Ext@Vendor.com, nobody, bad@, ext@vendor.com', lookup)
+        self.assertEqual(parsed, [
+            (self.bob.id, 'bob@example.com'), (self.alice.id, 'alice@example.com'), (None, 'ext@vendor.com'),
+        ])
+
+    def test_migration_parser_matches_the_importer(self):
+        migration = importlib.import_module('reports.migrations.0009_migrate_watching_by')
+        rows = list(User.objects.values_list('id', 'username', 'email', 'first_name', 'last_name'))
+        for text in ('bob; Alice Ng', 'ALICE,alice@example.com\nx@y.org', 'nobody, bad@, Ext@Vendor.com', ''):
+            self.assertEqual(
+                migration.parse_watching_by(text, migration.user_lookup(rows)),
+                parse_watching_by(text, watcher_lookup(rows)),
+            )
+
+    def test_importer_uses_the_shared_parser(self):
+        content = b'title,description,watching_by\nt,d,"bob, Alice Ng, ext@vendor.com"\n'
+        self.client.post('/api/incidents/import/', {'file': SimpleUploadedFile('t.csv', content)}, format='multipart')
+        watchers = IncidentWatcher.objects.order_by('email').values_list('user_id', 'email')
+        self.assertEqual(list(watchers), [
+            (self.alice.id, 'alice@example.com'), (self.bob.id, 'bob@example.com'), (None, 'ext@vendor.com'),
+        ])
+
+    def test_changes_coalesce_into_one_email_per_watcher(self):
+        incident = Incident.objects.create(title='Printer', description='d', status=self.open)
+        for user in (self.alice, self.bob):
+            IncidentWatcher.objects.create(incident=incident, user=user, email=user.email)
+        IncidentWatcher.objects.create(incident=incident, email='ext@vendor.com')
+
+        # IncidentViewSet only accepts form posts
+        self.client.patch(f'/api/incidents/{incident.id}/', {'priority': 'High'}, format='multipart')
+        self.client.patch(f'/api/incidents/{incident.id}/', {'urgency': 'High'}, format='multipart')
+
+        # The actor is not told about their own changes.
+        self.assertFalse(WatcherEvent.objects.filter(watcher__user=self.alice).exists())
+
+        self.assertEqual(send_watcher_digests(window_minutes=15)['emails'], 0)
+        self.assertEqual(mail.outbox, [])
+
+        summary = send_watcher_digests(window_minutes=15, now=timezone.now() + timedelta(minutes=16))
+        self.assertEqual(summary['coalesced'], {'bob@example.com': 2, 'ext@vendor.com': 2})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['bob@example.com', 'ext@vendor.com'])
+        self.assertIn('Priority Change', mail.outbox[0].body)
+        self.assertIn('Urgency Change', mail.outbox[0].body)
+
+        later = timezone.now() + timedelta(minutes=60)
+        self.assertEqual(send_watcher_digests(window_minutes=15, now=later)['emails'], 0)
+
+    def test_watchers_endpoint_validates_and_normalises(self):
+        customer = User.objects.create_user('carol', 'Carol@Example.com', 'password')
+        incident = Incident.objects.create(title='t', description='d', status=self.open, requester_email=customer.email)
+        url = f'/api/incidents/{incident.id}/watchers/'
+        client = APIClient()
+        client.force_authenticate(customer)
+
+        self.assertEqual(client.post(url, {'email': 'not an email'}, format='multipart').status_code, 400)
+        self.assertEqual(client.post(url, {'email': 'victim@other.com'}, format='multipart').status_code, 403)
+        client.post(url, {}, format='multipart')
+        client.post(url, {'email': 'CAROL@example.com'}, format='multipart')
+
+        self.client.post(url, {'email': 'Victim@Other.com'}, format='multipart')
+        response = self.client.post(url, {'email': 'victim@other.com'}, format='multipart')
+        self.assertEqual(response.data['watchers'], ['carol@example.com', 'victim@other.com'])
+
+        response = client.delete(url, {'email': 'victim@other.com'}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+    def test_watching_by_is_read_only_in_admin(self):
+        incident = Incident.objects.create(title='t', description='d', status=self.open, watching_by='bob')
+        self.client = self.client_class()
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('admin:reports_incident_change', args=[incident.id]))
+        self.assertNotContains(response, 'name="watching_by"')
+
+
+class SimilarIncidentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.open = StatusLabel.objects.create(name='Open')
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        title = 'VPN keeps disconnecting from the office network'
+        cls.original = Incident.objects.create(title=title, description='Drops every few minutes', status=cls.open)
+        cls.copies = [
+            Incident.objects.create(title=title, description=f'Drops every few minutes {i}', status=cls.open)
+            for i in range(3)
+        ]
+        cls.unrelated = Incident.objects.create(title='Printer out of toner', description='Floor 3', status=cls.open)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def similar_ids(self, query=''):
+        response = self.client.get(f'/api/incidents/{self.original.id}/similar/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data]
+
+    def test_similar_finds_near_duplicates_only(self):
+        self.assertEqual(sorted(self.similar_ids()), sorted(i.id for i in self.copies))
+
+    def test_limit_is_at_least_one(self):
+        self.assertEqual(len(self.similar_ids('?limit=0')), 1)
+        self.assertEqual(len(self.similar_ids('?limit=-1')), 1)
+
+    def test_create_with_check_duplicates_returns_conflict(self):
+        data = {'title': self.original.title, 'description': 'Drops every few minutes', 'check_duplicates': 'true'}
+        response = self.client.post('/api/incidents/', data, format='multipart')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(self.original.id, [row['id'] for row in response.data['duplicates']])
+
+        data['check_duplicates'] = 'maybe'
+        self.assertEqual(self.client.post('/api/incidents/', data, format='multipart').status_code, 400)
+
+        data['check_duplicates'] = 'false'
+        response = self.client.post('/api/incidents/', data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+    def test_other_users_tickets_do_not_crowd_out_the_requesters_own(self):
+        customer = User.objects.create_user('carol', 'carol@example.com', 'password')
+        title, description = 'Outlook crashes when opening calendar', 'Every morning since the update'
+        others = Incident.objects.bulk_create([
+            Incident(title=title, description=description, requester_email='someone@example.com')
+            for _ in range(MAX_CANDIDATES + 10)
+        ])
+        index_incidents(others)
+        own = Incident.objects.create(
+            title=title, description='Every morning since the last update', requester_email=customer.email,
+        )
+
+        client = APIClient()
+        client.force_authenticate(customer)
+        data = {'title': title, 'description': description, 'check_duplicates': 'true'}
+        response = client.post('/api/incidents/', data, format='multipart')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([row['id'] for row in response.data['duplicates']], [own.id])
+
+
+class TagFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.vpn = Incident.objects.create(title='vpn', description='d', tags=['VPN', ' network '])
+        cls.wifi = Incident.objects.create(title='wifi', description='d', tags=['network'])
+        cls.printer = Incident.objects.create(title='printer', description='d', tags=['hardware'])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin_user)
+
+    def titles(self, query):
+        response = self.client.get(f'/api/incidents/{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['title'] for row in response.data['results'])
+
+    def test_any_and_all_filters(self):
+        self.assertEqual(self.titles('?tags=vpn,Hardware'), ['printer', 'vpn'])
+        self.assertEqual(self.titles('?tags__all=network,vpn'), ['vpn'])
+        self.assertEqual(self.titles('?tags__all=network'), ['vpn', 'wifi'])
+        self.assertEqual(self.titles('?tags__all=network,hardware'), [])
+
+    def test_index_follows_edits(self):
+        self.wifi.tags = ['hardware']
+        self.wifi.save()
+        self.assertEqual(self.titles('?tags=network'), ['vpn'])
+        self.assertEqual(IncidentTag.objects.filter(incident=self.wifi).count(), 1)
+
+    def test_tag_counts_respect_filters(self):
+        response = self.client.get('/api/incidents/tag-counts/')
+        self.assertEqual(
+            {row['tag']: row['count'] for row in response.data}, {'network': 2, 'vpn': 1, 'hardware': 1}
+        )
+        response = self.client.get('/api/incidents/tag-counts/?tags=vpn')
+        self.assertEqual({row['tag']: row['count'] for row in response.data}, {'network': 1, 'vpn': 1})
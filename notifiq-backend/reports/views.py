@@ -2,7 +2,7 @@ from rest_framework import viewsets, generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth.models import User
-from .models import Incident, Attachment, Asset, ActivityLog, StatusLabel, UserNote
+from .models import Incident, Attachment, Asset, ActivityLog, StatusLabel, UserNote, IncidentWatcher
 from .serializers import (
     IncidentSerializer,
     AttachmentSerializer,
@@ -11,7 +11,8 @@ from .serializers import (
     RegisterSerializer,
     MyTokenObtainPairSerializer,
     StatusLabelSerializer,
-    UserNoteSerializer
+    UserNoteSerializer,
+    SimilarIncidentSerializer
 )
 import json
 from rest_framework.decorators import action
@@ -24,6 +25,31 @@ from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
+from .importers import import_incidents, DEFAULT_BATCH_SIZE
+from .asset_sync import sync_assets
+from .similarity import find_similar, DEFAULT_THRESHOLD, DEFAULT_LIMIT
+from .routing import Router, rebalance_unassigned
+from .filters import IncidentFilter
+from .tagging import count_tags
+from .watchers import queue_watcher_events, normalize_watcher_email
+
+
+def is_it_staff(user):
+    return user.is_superuser or user.groups.filter(name='IT Staff').exists()
+
+
+def parse_flag(value, name):
+    # bool("false") is True, so parse string flags from form posts explicitly
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ('true', '1', 'yes', 'false', '0', 'no', ''):
+        return value.strip().lower() in ('true', '1', 'yes')
+    raise ValueError(f'{name} must be true or false.')
+
+
+class IsITStaff(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and is_it_staff(request.user))
 
 class StatusLabelViewSet(viewsets.ModelViewSet):
     queryset = StatusLabel.objects.all()
@@ -90,7 +116,7 @@ class IncidentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['requester_email', 'agent', 'status__name']
+    filterset_class = IncidentFilter
 
     def get_queryset(self):
         user = self.request.user
@@ -105,27 +131,54 @@ class IncidentViewSet(viewsets.ModelViewSet):
         """
         Manually override the default list action to ensure data is returned.
         """
-        queryset = self.get_queryset()
+        queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         # We manually wrap the data in a 'results' key to match the frontend's expectation
         return Response({'results': serializer.data})
 
+    def _similar_response(self, matches):
+        for incident, score in matches:
+            incident.score = score
+        return SimilarIncidentSerializer([incident for incident, _ in matches], many=True).data
+
+    def create(self, request, *args, **kwargs):
+        # Optional duplicate gate: the client resubmits without check_duplicates to file anyway
+        try:
+            check_duplicates = parse_flag(request.data.get('check_duplicates', False), 'check_duplicates')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if check_duplicates:
+            matches = find_similar(
+                request.data.get('title', ''), request.data.get('description', ''), queryset=self.get_queryset()
+            )
+            if matches:
+                return Response({'duplicates': self._similar_response(matches)}, status=status.HTTP_409_CONFLICT)
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         # Set default status to "Open" if not provided
         open_status = StatusLabel.objects.filter(name="Open").first()
-        serializer.save(requester_email=self.request.user.email, status=open_status)
+        extra = {}
+        if serializer.validated_data.get('agent') is None:
+            # Route to the least-loaded IT Staff member; the post_save signal records the load
+            routing_fields = {k: v for k, v in serializer.validated_data.items() if k in ('group', 'category', 'priority')}
+            agent_id = Router().pick(Incident(status=open_status, **routing_fields))
+            if agent_id is not None:
+                extra['agent_id'] = agent_id
+        serializer.save(requester_email=self.request.user.email, status=open_status, **extra)
 
     def partial_update(self, request, *args, **kwargs):
         print("DEBUG: partial_update data:", request.data)
         incident = self.get_object()
         user = request.user
         data = request.data.copy()
+        changes = []
         for key, value in data.items():
             if hasattr(incident, key) and getattr(incident, key) != value:
-                ActivityLog.objects.create(
+                changes.append(ActivityLog.objects.create(
                     incident=incident, user=user, activity_type=f'{key.replace("_", " ").title()} Change',
                     old_value=str(getattr(incident, key)), new_value=str(value)
-                )
+                ))
         if 'internal_note' in data:
             ActivityLog.objects.create(
                 incident=incident, user=user, activity_type='Note Added', note=data.get('internal_note')
@@ -133,6 +186,8 @@ class IncidentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(incident, data=data, partial=True)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
+        # Internal notes stay internal; only field changes go into watcher digests
+        queue_watcher_events(changes, actor_id=user.id)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
@@ -149,6 +204,64 @@ class IncidentViewSet(viewsets.ModelViewSet):
                 return Response({"error": f"Serialization failed on Incident ID {incident.id}", "details": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response({"status": "All tickets are OK"}, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[IsITStaff])
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            batch_size = int(request.data.get('batch_size') or DEFAULT_BATCH_SIZE)
+        except ValueError:
+            return Response({'error': 'batch_size must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            summary = import_incidents(upload, upload.name, batch_size=max(batch_size, 1))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='tag-counts')
+    def tag_counts(self, request):
+        counts = count_tags(self.filter_queryset(self.get_queryset()))
+        return Response([{'tag': row['tag__name'], 'count': row['count']} for row in counts])
+
+    @action(detail=False, methods=['post'], url_path='auto-assign', permission_classes=[IsITStaff])
+    def auto_assign(self, request):
+        return Response(rebalance_unassigned(user=request.user), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def watchers(self, request, pk=None):
+        # POST/DELETE with no email (un)watches for the current user; only IT Staff manage other addresses
+        incident = self.get_object()
+        if request.method != 'GET':
+            email = normalize_watcher_email(request.data.get('email') or request.user.email)
+            if not email:
+                return Response({'error': 'A valid email is required.'}, status=status.HTTP_400_BAD_REQUEST)
+            if email != (request.user.email or '').lower() and not is_it_staff(request.user):
+                return Response(
+                    {'error': 'You can only add or remove your own address.'}, status=status.HTTP_403_FORBIDDEN
+                )
+            if request.method == 'POST':
+                user = User.objects.filter(email__iexact=email).first()
+                IncidentWatcher.objects.get_or_create(incident=incident, email=email, defaults={'user': user})
+            else:
+                IncidentWatcher.objects.filter(incident=incident, email__iexact=email).delete()
+        emails = list(incident.watchers.order_by('email').values_list('email', flat=True))
+        return Response({'watchers': emails})
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        incident = self.get_object()
+        try:
+            threshold = float(request.query_params.get('threshold', DEFAULT_THRESHOLD))
+            limit = max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1)
+        except ValueError:
+            return Response({'error': 'threshold and limit must be numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        matches = find_similar(
+            incident.title, incident.description, queryset=self.get_queryset(),
+            exclude_id=incident.id, threshold=threshold, limit=limit,
+        )
+        return Response(self._similar_response(matches))
+
     @action(detail=True, methods=['post'])
     def duplicate(self, request, pk=None):
         original_incident = self.get_object()
@@ -194,6 +307,24 @@ class AssetViewSet(viewsets.ModelViewSet):
         if user.is_superuser or user.groups.filter(name='IT Staff').exists():
             return Asset.objects.all()
         return Asset.objects.none()
+
+    @action(detail=False, methods=['post'], permission_classes=[IsITStaff])
+    def sync(self, request):
+        # Accept either a bare list of assets or {"assets": [...], "retire_missing": true}
+        payload = request.data
+        options = {}
+        if isinstance(payload, dict):
+            options = payload
+            payload = payload.get('assets')
+        if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+            return Response({'error': 'Expected a list of asset objects.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            retire_missing = parse_flag(options.get('retire_missing', False), 'retire_missing')
+            dry_run = parse_flag(options.get('dry_run', False), 'dry_run')
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        summary = sync_assets(payload, retire_missing=retire_missing, dry_run=dry_run)
+        return Response(summary, status=status.HTTP_200_OK)
     
 class UserNoteViewSet(viewsets.ModelViewSet):
     queryset = UserNote.objects.all().order_by('-created_at')
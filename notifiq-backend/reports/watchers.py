@@ -0,0 +1,144 @@
+import re
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMessage, get_connection
+from django.core.validators import validate_email
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import IncidentWatcher, WatcherEvent
+
+DEFAULT_WINDOW_MINUTES = 15
+# Messages handed to the SMTP connection per send_messages() call.
+SEND_CHUNK = 100
+
+WATCHING_BY_SEPARATORS = re.compile(r'[,;\n]+')
+
+
+def normalize_watcher_email(value):
+    """
+    Return the lowercased address, or None if it is not a valid email. Watchers
+    are stored lowercased so one inbox gets one digest, and an invalid address
+    would make send_messages() fail for the whole chunk it is in.
+    """
+    email = (value or '').strip().lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def watcher_lookup(users):
+    """
+    Build the map parse_watching_by() resolves entries against from
+    (id, username, email, first_name, last_name) rows. Migration 0009 keeps a
+    frozen copy of these rules; tests check that both still agree.
+    """
+    lookup = {}
+    for pk, username, email, first, last in users:
+        for key in (username, email, f'{first} {last}'.strip()):
+            if key:
+                lookup.setdefault(key.lower(), (pk, email))
+    return lookup
+
+
+def parse_watching_by(text, lookup):
+    """
+    Split legacy free-text watching_by into (user_id, email) pairs. Entries
+    naming a user by username, email or full name use that user's email;
+    anything else that is a valid address is kept as an external watcher.
+    Emails are lowercased; entries without a valid email, and repeats, are dropped.
+    """
+    watchers, seen = [], set()
+    for entry in WATCHING_BY_SEPARATORS.split(text or ''):
+        entry = entry.strip()
+        if not entry:
+            continue
+        user_id, email = lookup.get(entry.lower(), (None, None))
+        email = normalize_watcher_email(email or entry)
+        if not email or email in seen:
+            continue
+        seen.add(email)
+        watchers.append((user_id, email))
+    return watchers
+
+
+def queue_watcher_events(activities, actor_id=None):
+    """
+    Fan ActivityLog entries out to the incident's watchers as pending digest
+    events. The person who made the change is not notified about it.
+    """
+    activities = [a for a in activities if a.pk is not None]
+    if not activities:
+        return 0
+    watchers = {}
+    for watcher in IncidentWatcher.objects.filter(incident_id__in={a.incident_id for a in activities}):
+        if actor_id is None or watcher.user_id != actor_id:
+            watchers.setdefault(watcher.incident_id, []).append(watcher)
+    events = [
+        WatcherEvent(watcher=watcher, activity=activity)
+        for activity in activities
+        for watcher in watchers.get(activity.incident_id, [])
+    ]
+    WatcherEvent.objects.bulk_create(events, batch_size=1000)
+    return len(events)
+
+
+def _digest_message(email, events):
+    incidents = []
+    for incident, incident_events in groupby(events, key=lambda e: e.activity.incident):
+        incidents.append({'incident': incident, 'changes': [e.activity for e in incident_events]})
+    body = render_to_string('watcher_digest_email.txt', {'incidents': incidents, 'count': len(events)})
+    subject = f'NotifiQ: {len(events)} update{"s" if len(events) != 1 else ""} on watched tickets'
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email])
+
+
+def send_watcher_digests(window_minutes=DEFAULT_WINDOW_MINUTES, now=None, connection=None):
+    """
+    Send one email per recipient covering every pending change, over a single
+    mail connection. A recipient is only mailed once their oldest pending
+    change is `window_minutes` old, so bursts of edits collapse into one email.
+
+    Returns {'emails': n, 'changes': n, 'coalesced': {email: changes_in_that_email}}.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(minutes=window_minutes)
+    due = set(
+        WatcherEvent.objects.filter(sent_at__isnull=True, created_at__lte=cutoff)
+        .values_list('watcher__email', flat=True).distinct()
+    )
+    summary = {'emails': 0, 'changes': 0, 'coalesced': {}}
+    if not due:
+        return summary
+
+    pending = (
+        WatcherEvent.objects.filter(sent_at__isnull=True, watcher__email__in=due, created_at__lte=now)
+        .select_related('watcher', 'activity', 'activity__user', 'activity__incident')
+        .order_by('watcher__email', 'activity__incident_id', 'activity__timestamp', 'id')
+    )
+    connection = connection or get_connection()
+    messages, sent_ids = [], []
+
+    def flush():
+        if messages:
+            connection.send_messages(messages)
+            WatcherEvent.objects.filter(id__in=sent_ids).update(sent_at=now)
+            messages.clear()
+            sent_ids.clear()
+
+    with connection:
+        for email, events in groupby(pending.iterator(chunk_size=1000), key=lambda e: e.watcher.email):
+            events = list(events)
+            messages.append(_digest_message(email, events))
+            sent_ids.extend(e.id for e in events)
+            summary['emails'] += 1
+            summary['changes'] += len(events)
+            summary['coalesced'][email] = summary['coalesced'].get(email, 0) + len(events)
+            if len(messages) >= SEND_CHUNK:
+                flush()
+        flush()
+    return summary